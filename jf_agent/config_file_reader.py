@@ -25,6 +25,7 @@ class GitConfig:
     git_strip_text_content: bool
     git_redact_names_and_urls: bool
     gitlab_per_page_override: bool
+    gitlab_concurrent_threads: int
     git_verbose: bool
     # For multi-git
     creds_envvar_prefix: str
@@ -348,6 +349,7 @@ def _get_git_config(git_config, git_provider_override=None, multiple=False) -> G
         git_strip_text_content=git_config.get('strip_text_content', False),
         git_redact_names_and_urls=git_config.get('redact_names_and_urls', False),
         gitlab_per_page_override=git_config.get('gitlab_per_page_override', None),
+        gitlab_concurrent_threads=git_config.get('gitlab_concurrent_threads', 8),
         git_verbose=git_config.get('verbose', False),
         creds_envvar_prefix=creds_envvar_prefix,
         # legacy fields ===========
@@ -11,7 +11,11 @@ from stashy.client import Stash
 from jf_agent.session import retry_session
 from jf_agent.git.bitbucket_cloud_client import BitbucketCloudClient
 from jf_agent.git.github_client import GithubClient
-from jf_agent.git.gitlab_client import GitLabClient
+from jf_agent.git.gitlab_client import (
+    GitLabClient,
+    MERGE_REQUEST_FETCH_WORKERS,
+    PAGE_FETCH_WORKERS,
+)
 from jf_agent.config_file_reader import GitConfig
 
 from jf_agent import agent_logging, diagnostics, download_and_write_streaming, write_file
@@ -249,12 +253,17 @@ def get_git_client(config: GitConfig, git_creds: dict, skip_ssl_verification: bo
                 session=retry_session(),
             )
         if config.git_provider == GL_PROVIDER:
+            # each of the merge requests expanded at once has its sub-resource requests in flight
+            # at the same time; keep enough connections alive for all of them, so none have to
+            # open (and then throw away) a connection of their own
+            expand_workers = config.gitlab_concurrent_threads * MERGE_REQUEST_FETCH_WORKERS
             return GitLabClient(
                 server_url=config.git_url,
                 private_token=git_creds['gitlab_token'],
                 verify=not skip_ssl_verification,
                 per_page_override=config.gitlab_per_page_override,
-                session=retry_session(),
+                session=retry_session(pool_maxsize=max(expand_workers, PAGE_FETCH_WORKERS)),
+                expand_workers=expand_workers,
             )
 
     except Exception as e:
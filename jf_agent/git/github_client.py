@@ -164,7 +164,7 @@ class GithubClient:
                 # fetch the next page
                 result = self.get_raw_result(url)
                 page = result.json()
-                if type(page) != list:
+                if not isinstance(page, list):
                     raise ValueError(f'Expected an array of json results, but got: {page}')
 
                 if len(page) == 0:
@@ -1,9 +1,13 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain, islice
 from jf_agent.git.utils import get_branches_for_normalized_repo
 import gitlab
 from tqdm import tqdm
 import requests
 from dateutil import parser
-from typing import List
+from typing import List, Optional
 import logging
 from jf_agent.git import (
     GitAdapter,
@@ -90,6 +94,11 @@ class GitLabAdapter(GitAdapter):
         print('downloading gitlab repos... ', end='', flush=True)
 
         nrm_repos: List[NormalizedRepository] = []
+
+        # these get checked for every repo in every project, so look them up in sets
+        include_repos = set(self.config.git_include_repos or ())
+        exclude_repos = set(self.config.git_exclude_repos or ())
+
         for nrm_project in normalized_projects:
 
             repos_that_failed_to_download = []
@@ -103,10 +112,10 @@ class GitLabAdapter(GitAdapter):
                 start=1,
             ):
                 if (
-                    self.config.git_include_repos
+                    include_repos
                     # For GitLab, git_include_repos holds IDs instead of names (probably unintentionally), so
                     # no need to be case insensitive
-                    and api_repo.id not in self.config.git_include_repos
+                    and api_repo.id not in include_repos
                 ):
                     if self.config.git_verbose:
                         agent_logging.log_and_print(
@@ -117,10 +126,10 @@ class GitLabAdapter(GitAdapter):
                     continue  # skip this repo
 
                 if (
-                    self.config.git_exclude_repos
+                    exclude_repos
                     # For GitLab, git_exclude_repos holds IDs instead of names (probably unintentionally), so
                     # no need to be case insensitive
-                    and api_repo.id in self.config.git_exclude_repos
+                    and api_repo.id in exclude_repos
                 ):
                     if self.config.git_verbose:
                         agent_logging.log_and_print(
@@ -249,81 +258,62 @@ class GitLabAdapter(GitAdapter):
                         server_git_instance_info, nrm_repo.project.login, nrm_repo.id, 'prs'
                     )
 
-                    api_prs = self.client.list_project_merge_requests(nrm_repo.id)
+                    api_prs = self.client.list_project_merge_requests(
+                        nrm_repo.id, updated_after=pull_since
+                    )
 
-                    if not api_prs or not api_prs.total:
+                    # GitLab leaves the total count off of very large result sets, so check for
+                    # PRs by pulling the first one rather than trusting `total` (or len())
+                    api_prs_iter = iter(api_prs)
+                    first_api_pr = next(api_prs_iter, None)
+                    if first_api_pr is None:
+                        # the list only holds PRs updated in the pull window, so this is routine on
+                        # incremental runs for quiet repos -- nothing to warn about
                         agent_logging.log_and_print(
-                            logger, logging.WARNING, f"No PRs returned for repo {nrm_repo.id}"
+                            logger,
+                            logging.INFO,
+                            f"No PRs updated since {pull_since} for repo {nrm_repo.id}",
                         )
                         continue
 
-                    for api_pr in tqdm(
-                        api_prs,
+                    try:
+                        total_prs = api_prs.total
+                    except TypeError:
+                        # python-gitlab int()s the X-Total header, which GitLab leaves off of
+                        # very large result sets
+                        total_prs = None
+
+                    normalize_pr = partial(
+                        self._get_normalized_pr, nrm_repo=nrm_repo, pull_since=pull_since
+                    )
+
+                    api_prs_iter = tqdm(
+                        chain([first_api_pr], api_prs_iter),
                         desc=f'processing prs for {nrm_repo.name} ({nrm_repo.id})',
                         unit='prs',
-                        total=api_prs.total,
-                    ):
-                        try:
-                            updated_at = parser.parse(api_pr.updated_at)
-
-                            # PRs are ordered newest to oldest
-                            # if this is too old, we're done with this repo
-                            if pull_since and updated_at < pull_since:
-                                break
-
-                            try:
-                                api_pr = self.client.expand_merge_request_data(api_pr)
-                            except MissingSourceProjectException as e:
-                                log_and_print_request_error(
-                                    e,
-                                    f'fetching source project {api_pr.source_project_id} '
-                                    f'for merge_request {api_pr.id}. Skipping...',
-                                )
-                                continue
+                        total=total_prs,
+                    )
 
-                            nrm_commits: List[NormalizedCommit] = [
-                                _normalize_commit(
-                                    commit,
-                                    nrm_repo,
-                                    api_pr.target_branch,
-                                    self.config.git_strip_text_content,
-                                    self.config.git_redact_names_and_urls,
-                                )
-                                for commit in api_pr.commit_list
-                            ]
-                            merge_request = self.client.expand_merge_request_data(api_pr)
-                            merge_commit = None
-                            if (
-                                merge_request.state == 'merged'
-                                and nrm_commits is not None
-                                and merge_request.merge_commit_sha
-                            ):
-                                merge_commit = _normalize_commit(
-                                    self.client.get_project_commit(
-                                        merge_request.project_id, merge_request.merge_commit_sha
-                                    ),
-                                    nrm_repo,
-                                    api_pr.target_branch,
-                                    self.config.git_strip_text_content,
-                                    self.config.git_redact_names_and_urls,
-                                )
+                    # each PR needs several requests of its own to expand, so expand a handful at
+                    # once. Keep a sliding window of them in flight: take the oldest one as soon as
+                    # it's done and submit the next PR in its place. That keeps the results in
+                    # newest-to-oldest order and bounds how many PRs are listed and held at once,
+                    # without the pool going idle waiting on a whole batch.
+                    num_threads = self.config.gitlab_concurrent_threads
+                    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                        in_flight = deque(
+                            executor.submit(normalize_pr, api_pr)
+                            for api_pr in islice(api_prs_iter, num_threads)
+                        )
+                        while in_flight:
+                            nrm_pr = in_flight.popleft().result()
 
-                            yield _normalize_pr(
-                                api_pr,
-                                nrm_commits,
-                                self.config.git_strip_text_content,
-                                self.config.git_redact_names_and_urls,
-                                merge_commit,
-                            )
-                        except Exception as e:
-                            # if something goes wrong with normalizing one of the prs - don't stop pulling. try
-                            # the next one.
-                            pr_id = f' {api_pr.id}' if api_pr else ''
-                            log_and_print_request_error(
-                                e,
-                                f'normalizing PR {pr_id} from repo {nrm_repo.name} ({nrm_repo.id}). Skipping...',
-                                log_as_exception=True,
-                            )
+                            next_api_pr = next(api_prs_iter, None)
+                            if next_api_pr is not None:
+                                in_flight.append(executor.submit(normalize_pr, next_api_pr))
+
+                            if nrm_pr:
+                                yield nrm_pr
 
                 except Exception as e:
                     # if something happens when pulling PRs for a repo, just keep going.
@@ -333,6 +323,69 @@ class GitLabAdapter(GitAdapter):
                         log_as_exception=True,
                     )
 
+    def _get_normalized_pr(self, api_pr, nrm_repo, pull_since) -> Optional[NormalizedPullRequest]:
+        """
+        Expands and normalizes a single merge request.  Returns None if the merge request should
+        be skipped -- if it's outside the pull window, or if something goes wrong with it, since
+        one bad PR shouldn't stop the rest from being pulled.
+        """
+        try:
+            updated_at = parser.parse(api_pr.updated_at)
+
+            # GitLab filters on updated_after for us, but don't trust it blindly
+            if pull_since and updated_at < pull_since:
+                return None
+
+            try:
+                api_pr = self.client.expand_merge_request_data(api_pr)
+            except MissingSourceProjectException as e:
+                log_and_print_request_error(
+                    e,
+                    f'fetching source project {api_pr.source_project_id} '
+                    f'for merge_request {api_pr.id}. Skipping...',
+                )
+                return None
+
+            nrm_commits: List[NormalizedCommit] = [
+                _normalize_commit(
+                    commit,
+                    nrm_repo,
+                    api_pr.target_branch,
+                    self.config.git_strip_text_content,
+                    self.config.git_redact_names_and_urls,
+                )
+                for commit in api_pr.commit_list
+            ]
+            merge_commit = None
+            # the merge commit can be missing (e.g. a force-push removed it);
+            # send the PR without it rather than dropping the whole PR
+            if api_pr.state == 'merged' and api_pr.merge_commit:
+                merge_commit = _normalize_commit(
+                    api_pr.merge_commit,
+                    nrm_repo,
+                    api_pr.target_branch,
+                    self.config.git_strip_text_content,
+                    self.config.git_redact_names_and_urls,
+                )
+
+            return _normalize_pr(
+                api_pr,
+                nrm_commits,
+                self.config.git_strip_text_content,
+                self.config.git_redact_names_and_urls,
+                merge_commit,
+            )
+        except Exception as e:
+            # if something goes wrong with normalizing one of the prs - don't stop pulling. try
+            # the next one.
+            pr_id = f' {api_pr.id}' if api_pr else ''
+            log_and_print_request_error(
+                e,
+                f'normalizing PR {pr_id} from repo {nrm_repo.name} ({nrm_repo.id}). Skipping...',
+                log_as_exception=True,
+            )
+            return None
+
     print('✓')
 
 
@@ -502,8 +555,9 @@ def _normalize_pr(
     # OJ-7701: GitLab merge requests have a PATCH in the diff attribute, not standard diff format. We can't
     # determine the number of files changed from a patch, but we can get the number of lines added and deleted.
     # To get the number of files changed, we can just use the length of the list returned from changes(), which
-    # contains file information for each file changed in the merge request.
-    changed_files = len(merge_request.changes()['changes'])
+    # contains file information for each file changed in the merge request. That list was already fetched when
+    # the merge request was expanded, so don't request it again.
+    changed_files = len(merge_request.change_list)
 
     return NormalizedPullRequest(
         id=merge_request.id,
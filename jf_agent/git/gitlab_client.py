@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import gitlab
 import logging
 import requests
@@ -6,6 +8,12 @@ from jf_agent import agent_logging
 
 logger = logging.getLogger(__name__)
 
+# Number of requests each merge request has in flight at once while it's being expanded
+MERGE_REQUEST_FETCH_WORKERS = 5
+
+# Max number of list pages to fetch at once when the page count is known up front
+PAGE_FETCH_WORKERS = 8
+
 
 class MissingSourceProjectException(Exception):
     pass
@@ -35,7 +43,15 @@ def log_and_print_request_error(e, action='making request', log_as_exception=Fal
 
 
 class GitLabClient:
-    def __init__(self, server_url, private_token, verify, per_page_override, session):
+    def __init__(
+        self,
+        server_url,
+        private_token,
+        verify,
+        per_page_override,
+        session,
+        expand_workers=MERGE_REQUEST_FETCH_WORKERS,
+    ):
         kwargs = {'private_token': private_token, 'session': session}
         if per_page_override is not None:
             kwargs['per_page'] = per_page_override
@@ -43,11 +59,54 @@ class GitLabClient:
             kwargs['ssl_verify'] = False
         self.client = gitlab.Gitlab(server_url, **kwargs)
 
+        # groups and projects are looked up over and over (e.g. the target project of every
+        # merge request), so keep the ones we've already fetched, keyed by id
+        self._group_cache = {}
+        self._project_cache = {}
+
+        # one pool, shared by every merge request being expanded, for fetching their
+        # sub-resources -- rather than spinning up (and tearing down) threads for each one
+        self._expand_executor = ThreadPoolExecutor(
+            max_workers=expand_workers, thread_name_prefix='gitlab_expand'
+        )
+
     @staticmethod
-    def _get_diff_string(merge_request):
-        changes = merge_request.changes()
-        diffs = [change['diff'] for change in changes['changes']]
-        return '\n'.join(diffs)
+    def _list_all_pages(manager, **kwargs):
+        """
+        Yields every object from a paginated list endpoint. The first page tells us how many
+        pages there are, so the remaining pages are fetched concurrently. GitLab omits the page
+        count for very large result sets; in that case we follow the next-page links one at a time.
+        """
+        first_page = manager.list(as_list=False, **kwargs)
+        try:
+            total_pages = first_page.total_pages
+        except TypeError:
+            # python-gitlab int()s the X-Total-Pages header, which GitLab leaves off of very
+            # large result sets
+            total_pages = None
+
+        if not total_pages or total_pages <= 1:
+            yield from first_page
+            return
+
+        # only consume what's already been fetched so the list doesn't page ahead on its own
+        yield from islice(first_page, first_page.per_page)
+
+        def _get_page(page):
+            return manager.list(page=page, per_page=first_page.per_page, **kwargs)
+
+        remaining_pages = range(2, total_pages + 1)
+        with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+            # fetch a window of pages at a time, so a slow consumer doesn't end up with the
+            # entire result set buffered in memory
+            for i in range(0, len(remaining_pages), PAGE_FETCH_WORKERS):
+                window = remaining_pages[i : i + PAGE_FETCH_WORKERS]
+                for page in executor.map(_get_page, window):
+                    yield from page
+
+    @staticmethod
+    def _get_diff_string(change_list):
+        return '\n'.join(change['diff'] for change in change_list)
 
     def expand_merge_request_data(self, merge_request):
         """
@@ -57,7 +116,9 @@ class GitLabClient:
             - 'commit_list'     [object]
             - 'target_project'  object
             - 'target_project'  object
+            - 'change_list'     [dict]
             - 'diff'            string
+            - 'merge_commit'    object (None unless the merge request is merged)
         """
 
         target_project = self.get_project(merge_request.target_project_id)
@@ -76,8 +137,22 @@ class GitLabClient:
         else:
             merge_request.source_project = target_project
 
+        # notes, changes, approvals, commits, and the merge commit are independent of each other,
+        # so fetch them concurrently rather than paying for each round-trip in turn
+        executor = self._expand_executor
+        notes_future = executor.submit(lambda: merge_request.notes.list(as_list=False))
+        changes_future = executor.submit(lambda: merge_request.changes()['changes'])
+        approvals_future = executor.submit(lambda: merge_request.approvals.get())
+        # convert the 'commit_list' generator into a list of objects
+        commits_future = executor.submit(lambda: list(merge_request.commits()))
+        merge_commit_future = None
+        if merge_request.state == 'merged' and merge_request.merge_commit_sha:
+            merge_commit_future = executor.submit(
+                self.get_project_commit, merge_request.project_id, merge_request.merge_commit_sha
+            )
+
         try:
-            merge_request.note_list = merge_request.notes.list(as_list=False)
+            merge_request.note_list = notes_future.result()
         except (requests.exceptions.RetryError, gitlab.exceptions.GitlabGetError) as e:
             log_and_print_request_error(
                 e,
@@ -87,17 +162,18 @@ class GitLabClient:
             merge_request.note_list = []
 
         try:
-            merge_request.diff = GitLabClient._get_diff_string(merge_request)
+            merge_request.change_list = changes_future.result()
         except (requests.exceptions.RetryError, gitlab.exceptions.GitlabGetError) as e:
             log_and_print_request_error(
                 e,
                 f'fetching changes for merge_request {merge_request.id} -- '
                 f'handling it as if it has no diffs',
             )
-            merge_request.diff = ''
+            merge_request.change_list = []
+        merge_request.diff = GitLabClient._get_diff_string(merge_request.change_list)
 
         try:
-            approvals = merge_request.approvals.get()
+            approvals = approvals_future.result()
             merge_request.approved_by = approvals.approved_by
         except (
             requests.exceptions.RetryError,
@@ -111,20 +187,39 @@ class GitLabClient:
             )
             merge_request.approved_by = []
 
-        # convert the 'commit_list' generator into a list of objects
-        merge_request.commit_list = merge_request.commits()
+        merge_request.commit_list = commits_future.result()
+        merge_request.merge_commit = merge_commit_future.result() if merge_commit_future else None
 
         return merge_request
 
     def get_group(self, group_id):
+        if group_id in self._group_cache:
+            return self._group_cache[group_id]
+
         try:
-            return self.client.groups.get(group_id)
+            group = self.client.groups.get(group_id)
         except gitlab.exceptions.GitlabGetError as e:
             log_and_print_request_error(e, f'error fetching data for group {group_id}')
             return None
 
+        self._group_cache[group_id] = group
+        return group
+
     def get_project(self, project_id):
-        return self.client.projects.get(project_id)
+        project = self._project_cache.get(project_id)
+        if project is None:
+            # merge requests are expanded from several threads; fetch without holding any lock so
+            # one slow lookup doesn't stall the others. If two threads race on the same project,
+            # both fetch it and setdefault() keeps whichever lands first.
+            project = self._project_cache.setdefault(
+                project_id, self.client.projects.get(project_id)
+            )
+        return project
+
+    def _get_lazy_project(self, project_id):
+        # a lazy project is built without an API call -- it's only good for reaching the
+        # project's sub-resources (branches, commits, merge requests), not its attributes
+        return self.client.projects.get(project_id, lazy=True)
 
     def list_group_projects(self, group_id):
         group = self.get_group(group_id)
@@ -139,21 +234,29 @@ class GitLabClient:
         return group.members.list(as_list=False)
 
     def list_project_branches(self, project_id):
-        project = self.get_project(project_id)
+        project = self._get_lazy_project(project_id)
         return project.branches.list(as_list=False)
 
-    def list_project_merge_requests(self, project_id, state_filter=None):
-        project = self.get_project(project_id)
+    def list_project_merge_requests(self, project_id, state_filter=None, updated_after=None):
+        project = self._get_lazy_project(project_id)
         return project.mergerequests.list(
-            state=state_filter, as_list=False, order_by='updated_at', sort='desc'
+            state=state_filter,
+            updated_after=updated_after.isoformat() if updated_after else None,
+            as_list=False,
+            order_by='updated_at',
+            sort='desc',
         )
 
     def list_project_commits(self, project_id, since_date, branch_name=None):
-        project = self.get_project(project_id)
-        return project.commits.list(since=since_date, ref_name=branch_name, as_list=False)
+        project = self._get_lazy_project(project_id)
+        return GitLabClient._list_all_pages(
+            project.commits,
+            since=since_date.isoformat() if since_date else None,
+            ref_name=branch_name,
+        )
 
     def get_project_commit(self, project_id, sha):
-        project = self.get_project(project_id)
+        project = self._get_lazy_project(project_id)
         try:
             return project.commits.get(sha)
         except gitlab.exceptions.GitlabGetError:
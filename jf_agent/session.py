@@ -1,5 +1,5 @@
 import requests
-from requests.adapters import HTTPAdapter
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
 
@@ -20,9 +20,10 @@ class ReauthSession(requests.Session):
         return response
 
 
-def retry_session(**kwargs):
+def retry_session(pool_maxsize=DEFAULT_POOLSIZE, **kwargs):
     """
     Obtains a requests session with retry settings.
+    :param pool_maxsize: max number of keep-alive connections kept per host
     :return: session: Session
     """
 
@@ -40,7 +41,7 @@ def retry_session(**kwargs):
         status_forcelist=status_forcelist,
     )
 
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
 
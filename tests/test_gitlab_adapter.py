@@ -1,9 +1,10 @@
 import json
+import logging
 import unittest
 
 from collections import namedtuple
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, PropertyMock, patch
 
 from jf_agent.git import NormalizedShortRepository
 from jf_agent.git.gitlab_adapter import GitLabAdapter
@@ -19,6 +20,7 @@ class TestGitLabAdapter(TestCase):
         self.mock_config.git_include_projects = ['test_project_id']
         self.mock_config.git_strip_text_content = False
         self.mock_config.git_redact_names_and_urls = False
+        self.mock_config.gitlab_concurrent_threads = 1
 
         self.mock_client = MagicMock()
 
@@ -392,6 +394,115 @@ class TestGitLabAdapter(TestCase):
         )
         self.assertFalse(pr_commit.is_merge)
 
+    def test_get_pull_requests_without_total(self):
+        # Arrange
+        mock_repo = MagicMock()
+        mock_repos = [mock_repo]
+
+        # Set pull_from to very far in the past to ensure fake timestamps in test PRs are after this date.
+        test_git_instance_info = {'pull_from': '1900-07-23', 'repos_dict_v2': {}}
+
+        mock_pr = MagicMock()
+        mock_pr.commit_list = []
+        mock_pr.updated_at = "2017-04-29T08:46:00Z"
+        mock_pr.state = 'opened'
+
+        # GitLab doesn't send a total count for very large result sets, and python-gitlab
+        # raises when it tries to int() the missing header
+        mock_prs = MagicMock()
+        type(mock_prs).total = PropertyMock(side_effect=TypeError('X-Total header missing'))
+        mock_prs.__iter__.return_value = [mock_pr]
+
+        self.mock_client.list_project_merge_requests.return_value = mock_prs
+        self.mock_client.expand_merge_request_data.return_value = mock_pr
+
+        # Act
+        resulting_prs = list(self.adapter.get_pull_requests(mock_repos, test_git_instance_info))
+
+        # Assert
+        self.assertEqual(len(resulting_prs), 1, "Prs should be a list of size 1")
+        self.assertEqual(resulting_prs[0].id, mock_pr.id, "resulting pr id does not match input")
+
+    def test_get_pull_requests_none_updated(self):
+        # Arrange
+        mock_repo = MagicMock()
+        mock_repo.id = 'test_repo_id'
+
+        # Set pull_from to very far in the past to ensure fake timestamps in test PRs are after this date.
+        test_git_instance_info = {'pull_from': '1900-07-23', 'repos_dict_v2': {}}
+
+        # nothing has been updated in the pull window, so GitLab returns an empty list
+        mock_prs = MagicMock()
+        mock_prs.__iter__.return_value = []
+        self.mock_client.list_project_merge_requests.return_value = mock_prs
+
+        # Act
+        with patch('jf_agent.git.gitlab_adapter.agent_logging.log_and_print') as mock_log:
+            resulting_prs = list(
+                self.adapter.get_pull_requests([mock_repo], test_git_instance_info)
+            )
+
+        # Assert
+        self.assertEqual(len(resulting_prs), 0, "Prs should be an empty list")
+        self.mock_client.expand_merge_request_data.assert_not_called()
+        mock_log.assert_called_once()
+        self.assertEqual(
+            mock_log.call_args[0][1], logging.INFO, "an empty pull window should not warn"
+        )
+
+    def _get_merged_pull_request(self, merge_commit):
+        mock_repo = MagicMock()
+        mock_repo.url = "repo_url"
+
+        # Set pull_from to very far in the past to ensure fake timestamps in test PRs are after this date.
+        test_git_instance_info = {'pull_from': '1900-07-23', 'repos_dict_v2': {}}
+
+        mock_pr = MagicMock()
+        mock_pr.commit_list = []
+        mock_pr.updated_at = "2017-04-29T08:46:00Z"
+        mock_pr.state = 'merged'
+        mock_pr.merge_commit = merge_commit
+
+        mock_prs = MagicMock()
+        mock_prs.total = 1
+        mock_prs.__iter__.return_value = [mock_pr]
+
+        self.mock_client.list_project_merge_requests.return_value = mock_prs
+        self.mock_client.expand_merge_request_data.return_value = mock_pr
+
+        return list(self.adapter.get_pull_requests([mock_repo], test_git_instance_info))
+
+    def test_get_pull_requests_merged_with_merge_commit(self):
+        # Arrange
+        test_commits = _get_test_data('test_commits.json')
+        # Convert to named tuple to make fields accessible with dot notation
+        api_commit = namedtuple('api_commits', test_commits[0].keys())(*test_commits[0].values())
+
+        # Act
+        resulting_prs = self._get_merged_pull_request(api_commit)
+
+        # Assert
+        self.assertEqual(len(resulting_prs), 1, "Prs should be a list of size 1")
+        resulting_pr = resulting_prs[0]
+        self.assertTrue(resulting_pr.is_merged)
+        self.assertEqual(
+            resulting_pr.merge_commit.hash,
+            test_commits[0]['id'],
+            "resulting pr merge commit hash does not match input",
+        )
+
+    def test_get_pull_requests_merged_without_merge_commit(self):
+        # Act
+        # the merge commit couldn't be fetched (e.g. a force-push removed it)
+        resulting_prs = self._get_merged_pull_request(None)
+
+        # Assert
+        self.assertEqual(
+            len(resulting_prs), 1, "PR should still be sent when its merge commit is missing"
+        )
+        self.assertTrue(resulting_prs[0].is_merged)
+        self.assertIsNone(resulting_prs[0].merge_commit)
+
 
 def _get_test_data(file_name):
     with open(f'{TEST_INPUT_FILE_PATH}{file_name}', 'r') as f:
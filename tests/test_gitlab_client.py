@@ -0,0 +1,216 @@
+import unittest
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import gitlab
+
+from jf_agent.git.gitlab_client import GitLabClient
+
+
+class _FakeRESTObjectList:
+    """
+    Stands in for python-gitlab's RESTObjectList: iterating it yields the first page and then
+    follows the next-page links, and total_pages int()s the X-Total-Pages header.
+    """
+
+    def __init__(self, items, per_page, total_pages):
+        self._items = items
+        self._per_page = per_page
+        self._total_pages = total_pages
+
+    def __iter__(self):
+        return iter(self._items)
+
+    @property
+    def per_page(self):
+        return int(self._per_page)
+
+    @property
+    def total_pages(self):
+        return int(self._total_pages)
+
+
+class TestGitLabClient(TestCase):
+    def setUp(self):
+        self.client = GitLabClient(
+            server_url='https://gitlab.example.com',
+            private_token='test_token',
+            verify=True,
+            per_page_override=None,
+            session=MagicMock(),
+        )
+        self.client.client = MagicMock()
+
+        self.mock_commits_manager = MagicMock()
+        self.client.client.projects.get.return_value.commits = self.mock_commits_manager
+
+    def _list_project_commits(self):
+        return list(self.client.list_project_commits('test_project_id', None, 'master'))
+
+    def test_list_project_commits_single_page(self):
+        # Arrange
+        self.mock_commits_manager.list.return_value = _FakeRESTObjectList(
+            ['commit_1', 'commit_2'], per_page=20, total_pages=1
+        )
+
+        # Act
+        resulting_commits = self._list_project_commits()
+
+        # Assert
+        self.assertEqual(resulting_commits, ['commit_1', 'commit_2'])
+        self.assertEqual(
+            self.mock_commits_manager.list.call_count, 1, "only the first page should be requested"
+        )
+
+    def test_list_project_commits_multiple_pages(self):
+        # Arrange
+        pages = {
+            2: ['commit_3', 'commit_4'],
+            3: ['commit_5'],
+        }
+
+        def _list(page=None, **kwargs):
+            if page is None:
+                # the first page's list would follow the next-page links if fully consumed
+                return _FakeRESTObjectList(
+                    ['commit_1', 'commit_2', 'should_not_be_read'], per_page=2, total_pages=3
+                )
+            self.assertEqual(kwargs['per_page'], 2, "pages should be requested with the same size")
+            return pages[page]
+
+        self.mock_commits_manager.list.side_effect = _list
+
+        # Act
+        resulting_commits = self._list_project_commits()
+
+        # Assert
+        self.assertEqual(
+            resulting_commits,
+            ['commit_1', 'commit_2', 'commit_3', 'commit_4', 'commit_5'],
+            "commits should come back from every page, in page order",
+        )
+
+    def test_list_project_commits_without_total_pages(self):
+        # Arrange
+        # GitLab leaves off X-Total-Pages for very large result sets
+        self.mock_commits_manager.list.return_value = _FakeRESTObjectList(
+            ['commit_1', 'commit_2', 'commit_3'], per_page=2, total_pages=None
+        )
+
+        # Act
+        resulting_commits = self._list_project_commits()
+
+        # Assert
+        self.assertEqual(
+            resulting_commits,
+            ['commit_1', 'commit_2', 'commit_3'],
+            "commits should come from following the next-page links",
+        )
+        self.assertEqual(
+            self.mock_commits_manager.list.call_count, 1, "no pages should be requested by number"
+        )
+
+    def _get_merge_request(self, state='opened', merge_commit_sha=None):
+        self.client.client.projects.get.return_value.id = 'test_project_id'
+
+        merge_request = MagicMock()
+        merge_request.id = 'test_merge_request_id'
+        merge_request.project_id = 'test_project_id'
+        merge_request.target_project_id = 'test_project_id'
+        merge_request.source_project_id = 'test_project_id'
+        merge_request.state = state
+        merge_request.merge_commit_sha = merge_commit_sha
+        merge_request.changes.return_value = {'changes': [{'diff': '+a line'}]}
+        merge_request.commits.return_value = iter(['commit_1'])
+        return merge_request
+
+    def test_expand_merge_request_data_changes_error(self):
+        # Arrange
+        merge_request = self._get_merge_request()
+        merge_request.changes.side_effect = gitlab.exceptions.GitlabGetError('error', 500)
+
+        # Act
+        self.client.expand_merge_request_data(merge_request)
+
+        # Assert
+        self.assertEqual(merge_request.change_list, [], "a failed fetch should mean no changes")
+        self.assertEqual(merge_request.diff, '', "a failed fetch should mean an empty diff")
+        self.assertEqual(
+            merge_request.commit_list, ['commit_1'], "the other sub-resources should still be set"
+        )
+
+    def test_expand_merge_request_data_approvals_error(self):
+        # Arrange
+        merge_request = self._get_merge_request()
+        merge_request.approvals.get.side_effect = gitlab.exceptions.GitlabGetError('error', 500)
+
+        # Act
+        self.client.expand_merge_request_data(merge_request)
+
+        # Assert
+        self.assertEqual(merge_request.approved_by, [], "a failed fetch should mean no approvals")
+        self.assertEqual(merge_request.diff, '+a line')
+
+    def test_expand_merge_request_data_missing_merge_commit(self):
+        # Arrange
+        merge_request = self._get_merge_request(state='merged', merge_commit_sha='test_sha')
+        commits_manager = self.client.client.projects.get.return_value.commits
+        commits_manager.get.side_effect = gitlab.exceptions.GitlabGetError('not found', 404)
+
+        # Act
+        self.client.expand_merge_request_data(merge_request)
+
+        # Assert
+        commits_manager.get.assert_called_once_with('test_sha')
+        self.assertIsNone(
+            merge_request.merge_commit, "a merge commit that 404s should be left as None"
+        )
+
+    def test_expand_merge_request_data_not_merged(self):
+        # Arrange
+        merge_request = self._get_merge_request(state='closed', merge_commit_sha='test_sha')
+
+        # Act
+        with patch.object(self.client, 'get_project_commit') as mock_get_project_commit:
+            self.client.expand_merge_request_data(merge_request)
+
+        # Assert
+        mock_get_project_commit.assert_not_called()
+        self.assertIsNone(merge_request.merge_commit, "only merged requests have a merge commit")
+
+    def test_expand_merge_request_data_caches_target_project(self):
+        # Arrange
+        merge_requests = [self._get_merge_request(), self._get_merge_request()]
+
+        # Act
+        for merge_request in merge_requests:
+            self.client.expand_merge_request_data(merge_request)
+
+        # Assert
+        project_fetches = [
+            c for c in self.client.client.projects.get.call_args_list if not c[1].get('lazy')
+        ]
+        self.assertEqual(len(project_fetches), 1, "the target project should only be fetched once")
+        self.assertIs(merge_requests[0].target_project, merge_requests[1].target_project)
+
+    def test_get_group_does_not_cache_errors(self):
+        # Arrange
+        group = MagicMock()
+        self.client.client.groups.get.side_effect = [
+            gitlab.exceptions.GitlabGetError('error', 500),
+            group,
+        ]
+
+        # Act
+        first_group = self.client.get_group('test_group_id')
+        second_group = self.client.get_group('test_group_id')
+
+        # Assert
+        self.assertIsNone(first_group, "a failed fetch should return None")
+        self.assertIs(second_group, group, "a failed fetch should be retried on the next call")
+        self.assertEqual(self.client.client.groups.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()